@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+BlueZ backend for the Qtile Bluetooth status widget
+Reads every connected device and its battery level with one GetManagedObjects
+call on the BlueZ object manager, instead of running bluetoothctl per device
+"""
+
+import asyncio
+import logging
+import re
+import subprocess
+import threading
+
+from dbus_fast import BusType, Message, MessageType
+from dbus_fast.aio import MessageBus
+
+BLUEZ_SERVICE = "org.bluez"
+CALL_TIMEOUT = 2
+
+# Qtile's logger, without making the benchmark below depend on libqtile
+logger = logging.getLogger("libqtile")
+
+
+class BusUnreachable(Exception):
+    """The system bus itself could not be reached"""
+
+
+class BluezClient:
+    """
+    Blocking BlueZ client, safe to call from a widget's poll thread
+
+    The D-Bus connection lives on a private event loop that only runs for
+    the duration of each query, so it stays open between polls.
+
+    Args:
+        bus_address (str): Bus to use instead of the system bus (for testing)
+    """
+
+    def __init__(self, bus_address=None):
+        self.bus_address = bus_address
+        self._loop = asyncio.new_event_loop()
+        self._lock = threading.Lock()
+        self._bus = None
+
+    async def _managed_objects(self):
+        if self._bus is None or not self._bus.connected:
+            try:
+                self._bus = await MessageBus(
+                    bus_address=self.bus_address, bus_type=BusType.SYSTEM
+                ).connect()
+            except Exception as e:
+                raise BusUnreachable(str(e)) from e
+        try:
+            reply = await asyncio.wait_for(
+                self._bus.call(
+                    Message(
+                        destination=BLUEZ_SERVICE,
+                        path="/",
+                        interface="org.freedesktop.DBus.ObjectManager",
+                        member="GetManagedObjects",
+                    )
+                ),
+                CALL_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            # Drop the connection so a late reply cannot confuse the next query
+            self._bus.disconnect()
+            self._bus = None
+            raise
+        if reply.message_type != MessageType.METHOD_RETURN:
+            if reply.error_name == "org.freedesktop.DBus.Error.ServiceUnknown":
+                # bluetoothd is not running, so nothing is connected
+                return {}
+            raise RuntimeError(f"GetManagedObjects failed: {reply.error_name} {reply.body}")
+        return reply.body[0]
+
+    def connected_devices(self):
+        """
+        Get connected devices in one D-Bus round trip
+
+        Returns:
+            list: (name, battery percent or None) tuples
+        """
+        with self._lock:
+            objects = self._loop.run_until_complete(self._managed_objects())
+
+        devices = []
+        for path in sorted(objects):
+            interfaces = objects[path]
+            device = interfaces.get("org.bluez.Device1")
+            if not device or "Connected" not in device or not device["Connected"].value:
+                continue
+            name = device.get("Alias") or device.get("Name")
+            battery = interfaces.get("org.bluez.Battery1", {}).get("Percentage")
+            devices.append((
+                name.value if name else path.rsplit("/", 1)[-1],
+                battery.value if battery else None,
+            ))
+        return devices
+
+
+def format_status(devices):
+    """Format (name, battery) tuples for the bar"""
+    device_info = [name if battery is None else f"{name} {battery}%" for name, battery in devices]
+    return f" {', '.join(device_info)}" if device_info else ""
+
+
+def devices_from_bluetoothctl():
+    """Get connected devices by running bluetoothctl once per device (fallback path)"""
+    output = subprocess.check_output(["bluetoothctl", "devices", "Connected"], stderr=subprocess.DEVNULL).decode().strip()
+
+    devices = []
+    for device_line in output.split('\n'):
+        # Format: "Device XX:XX:XX:XX:XX:XX Device Name"
+        parts = device_line.split(' ', 2)
+        if len(parts) < 3:
+            continue
+        mac_address = parts[1]
+        device_name = parts[2]
+
+        try:
+            battery_output = subprocess.check_output(
+                ["bluetoothctl", "info", mac_address],
+                stderr=subprocess.DEVNULL
+            ).decode()
+        except subprocess.CalledProcessError:
+            devices.append((device_name, None))
+            continue
+
+        battery_match = re.search(r'Battery Percentage: \(0x[0-9a-f]+\) (\d+)', battery_output)
+        devices.append((device_name, int(battery_match.group(1)) if battery_match else None))
+    return devices
+
+
+_client = None
+_last_error = None
+
+
+def _log_once(message):
+    """Log a failure when it first appears rather than on every poll"""
+    global _last_error
+    if message != _last_error:
+        _last_error = message
+        logger.warning("Bluetooth status: %s", message)
+
+
+def get_status():
+    """Get Bluetooth status text, from D-Bus when available"""
+    global _client, _last_error
+    try:
+        if _client is None:
+            _client = BluezClient()
+        status = format_status(_client.connected_devices())
+        _last_error = None
+        return status
+    except BusUnreachable as e:
+        # No system bus at all: bluetoothctl is the only way left
+        _log_once(f"system bus unreachable ({e}), using bluetoothctl")
+    except asyncio.TimeoutError:
+        _log_once(f"BlueZ did not answer within {CALL_TIMEOUT}s")
+        return ""
+    except Exception as e:
+        _log_once(f"D-Bus query failed: {e}")
+        return ""
+    try:
+        return format_status(devices_from_bluetoothctl())
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+if __name__ == "__main__":
+    # Benchmark both paths against a fake BlueZ on a private bus
+    import os
+    import shutil
+    import tempfile
+    import time
+
+    from dbus_fast import Variant
+
+    ITERATIONS = 50
+
+    fake_dir = tempfile.mkdtemp(prefix="fake-bluez-")
+    with open(os.path.join(fake_dir, "bluetoothctl"), "w") as f:
+        f.write('#!/bin/sh\n'
+                'case "$1" in\n'
+                '  devices) cat "$(dirname "$0")/devices" ;;\n'
+                '  info) cat "$(dirname "$0")/info-$2" ;;\n'
+                'esac\n')
+    os.chmod(os.path.join(fake_dir, "bluetoothctl"), 0o755)
+    os.environ["PATH"] = f"{fake_dir}:{os.environ['PATH']}"
+
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--session", "--nofork", "--print-address=1"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    address = daemon.stdout.readline().decode().strip()
+
+    objects = {}
+    ready = threading.Event()
+
+    def serve():
+        async def main():
+            bus = await MessageBus(bus_address=address).connect()
+            await bus.request_name(BLUEZ_SERVICE)
+
+            def handler(message):
+                if message.member == "GetManagedObjects":
+                    return Message.new_method_return(message, "a{oa{sa{sv}}}", [objects])
+
+            bus.add_message_handler(handler)
+            ready.set()
+            try:
+                await bus.wait_for_disconnect()
+            except Exception:
+                # The private bus going away at the end of the run
+                pass
+
+        asyncio.run(main())
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+
+    def simulate(count):
+        objects.clear()
+        lines = []
+        for i in range(count):
+            mac = f"AA:BB:CC:DD:EE:{i:02X}"
+            name = f"Device {i}"
+            battery = 100 - i * 5
+            objects[f"/org/bluez/hci0/dev_{mac.replace(':', '_')}"] = {
+                "org.bluez.Device1": {
+                    "Address": Variant("s", mac),
+                    "Name": Variant("s", name),
+                    "Alias": Variant("s", name),
+                    "Connected": Variant("b", True),
+                },
+                "org.bluez.Battery1": {"Percentage": Variant("y", battery)},
+            }
+            lines.append(f"Device {mac} {name}")
+            with open(os.path.join(fake_dir, f"info-{mac}"), "w") as f:
+                f.write(f"Device {mac} (public)\n\tName: {name}\n\tAlias: {name}\n"
+                        "\tClass: 0x00240404\n\tIcon: audio-headset\n\tPaired: yes\n"
+                        "\tBonded: yes\n\tTrusted: yes\n\tBlocked: no\n\tConnected: yes\n"
+                        "\tUUID: Audio Sink                (0000110b-0000-1000-8000-00805f9b34fb)\n"
+                        "\tUUID: Handsfree                 (0000111e-0000-1000-8000-00805f9b34fb)\n"
+                        f"\tBattery Percentage: (0x{battery:02x}) {battery}\n")
+        with open(os.path.join(fake_dir, "devices"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def bench(func):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            result = func()
+        return (time.perf_counter() - start) / ITERATIONS * 1000, result
+
+    client = BluezClient(bus_address=address)
+    try:
+        print(f"{'devices':>8} {'bluetoothctl':>14} {'GetManagedObjects':>18} {'speedup':>8}")
+        for count in (1, 4, 8):
+            simulate(count)
+            subprocess_ms, expected = bench(devices_from_bluetoothctl)
+            dbus_ms, actual = bench(client.connected_devices)
+            assert format_status(expected) == format_status(actual), (expected, actual)
+            print(f"{count:>8} {subprocess_ms:>12.2f}ms {dbus_ms:>16.2f}ms {subprocess_ms / dbus_ms:>7.1f}x")
+    finally:
+        daemon.terminate()
+        shutil.rmtree(fake_dir)
@@ -6,6 +6,8 @@ Custom Weather Widget with owfont icons for Qtile
 import requests
 import json
 import datetime
+from array import array
+from bisect import bisect_right
 from libqtile.widget import base
 from owfont_weather import get_owfont_icon
 
@@ -20,12 +22,105 @@ class OwfontWeatherWidget(base.ThreadPoolText):
         ('update_interval', 1800, 'Update interval in seconds (30 minutes)'),
         ('font', 'owfont', 'Font family'),
         ('fontsize', 16, 'Font size'),
+        ('forecast', False, 'Render from a stored forecast, advancing locally between fetches'),
+        ('forecast_interval', 300, 'Local render interval in seconds in forecast mode (replaces update_interval)'),
+        ('forecast_horizon', 6 * 3600, 'Refetch when less forecast than this (seconds) remains'),
+        ('forecast_max_age', 3 * 3600, 'Refetch when the stored forecast is older than this (seconds)'),
+        ('forecast_retry', 900, 'Wait this long (seconds) before retrying a failed or short fetch'),
     ]
     
     def __init__(self, **config):
         base.ThreadPoolText.__init__(self, "", **config)
         self.add_defaults(OwfontWeatherWidget.defaults)
         
+        # Polls only render locally in forecast mode; fetches follow forecast_max_age
+        if self.forecast:
+            self.update_interval = self.forecast_interval
+        
+        # Forecast steps, indexed by time
+        self._times = array('l')
+        self._temps = array('f')
+        self._codes = array('H')
+        self._labels = array('B')
+        self._descriptions = []
+        self._sunrise = 0
+        self._sunset = 0
+        self._fetched = 0
+        
+    def _fetch_forecast(self, units):
+        """Fetch the 3-hourly forecast and store it in the time-indexed arrays"""
+        url = f"http://api.openweathermap.org/data/2.5/forecast?id={self.cityid}&appid={self.app_key}&units={units}"
+        
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        
+        data = response.json()
+        
+        times = array('l')
+        temps = array('f')
+        codes = array('H')
+        labels = array('B')
+        descriptions = []
+        for step in data['list']:
+            description = step['weather'][0]['description'].title()
+            if description not in descriptions:
+                descriptions.append(description)
+            times.append(step['dt'])
+            temps.append(step['main']['temp'])
+            codes.append(step['weather'][0]['id'])
+            labels.append(descriptions.index(description))
+        
+        self._times, self._temps, self._codes = times, temps, codes
+        self._labels, self._descriptions = labels, descriptions
+        self._sunrise = data['city']['sunrise']
+        self._sunset = data['city']['sunset']
+        
+    def _render_forecast(self, now, temp_unit):
+        """Render the forecast step for the current time without any API call"""
+        last = len(self._times) - 1
+        i = min(max(bisect_right(self._times, now) - 1, 0), last)
+        
+        # Interpolate temperature between steps, take conditions from the nearest one
+        temp = self._temps[i]
+        nearest = i
+        if i < last and self._times[i] <= now:
+            span = self._times[i + 1] - self._times[i]
+            progress = (now - self._times[i]) / span
+            temp += (self._temps[i + 1] - temp) * progress
+            if progress >= 0.5:
+                nearest = i + 1
+        
+        # Sunrise/sunset are for the fetch day; they shift by about a day each day
+        is_day = (now - self._sunrise) % 86400 < self._sunset - self._sunrise
+        
+        icon = get_owfont_icon(self._codes[nearest], is_day)
+        description = self._descriptions[self._labels[nearest]]
+        
+        return f"{icon} {round(temp)}{temp_unit} {description}"
+        
+    def _poll_forecast(self, units, temp_unit):
+        """Refetch only when the stored forecast runs short or ages out"""
+        now = datetime.datetime.now().timestamp()
+        
+        # _fetched records the last attempt, so outages and short replies back off
+        age = now - self._fetched
+        due = age > self.forecast_max_age
+        if not self._times or self._times[-1] - now < self.forecast_horizon:
+            due = due or age > self.forecast_retry
+        if due:
+            self._fetched = now
+            try:
+                self._fetch_forecast(units)
+            except requests.RequestException:
+                # Keep rendering stored data while it still covers now
+                if not self._times or self._times[-1] < now:
+                    raise
+        
+        if not self._times or self._times[-1] < now:
+            return "Weather: No forecast data"
+        
+        return self._render_forecast(now, temp_unit)
+        
     def poll(self):
         """Poll weather data from OpenWeatherMap API"""
         try:
@@ -36,6 +131,9 @@ class OwfontWeatherWidget(base.ThreadPoolText):
             units = "metric" if self.metric else "imperial"
             temp_unit = "°C" if self.metric else "°F"
             
+            if self.forecast:
+                return self._poll_forecast(units, temp_unit)
+            
             url = f"http://api.openweathermap.org/data/2.5/weather?id={self.cityid}&appid={self.app_key}&units={units}"
             
             # Make API request
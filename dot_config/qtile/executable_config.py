@@ -24,9 +24,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import asyncio
 import os
 import subprocess
-import time
 import libqtile.resources
 from libqtile import bar, layout, qtile, hook
 from qtile_extras import widget
@@ -34,7 +34,12 @@ from libqtile import widget as base_widget
 from qtile_extras.widget.decorations import RectDecoration
 from libqtile.config import Click, Drag, Group, Key, Match, Screen, ScratchPad, DropDown
 from libqtile.lazy import lazy
+from libqtile.log_utils import logger
 from libqtile.utils import guess_terminal
+import bluetooth
+import scheduler
+import supervisor
+import wallpaper
 
 gap_size = 5
 
@@ -58,76 +63,78 @@ def get_redshift_temp():
     except:
         return "󰌶 N/A"
 
-import subprocess
-import re
-
 def get_bluetooth_status():
     """Get Bluetooth status - show device name and battery percentage when connected"""
-    try:
-        # Get connected devices
-        output = subprocess.check_output(["bluetoothctl", "devices", "Connected"], stderr=subprocess.DEVNULL).decode().strip()
-        connected_devices = [line for line in output.split('\n') if line.strip()]
-        
-        if not connected_devices:
-            return ""
-        
-        device_info = []
-        
-        for device_line in connected_devices:
-            # Extract MAC address from the device line
-            # Format: "Device XX:XX:XX:XX:XX:XX Device Name"
-            parts = device_line.split(' ', 2)
-            if len(parts) >= 3:
-                mac_address = parts[1]
-                device_name = parts[2]
-                
-                # Get battery info for this device
-                try:
-                    battery_output = subprocess.check_output(
-                        ["bluetoothctl", "info", mac_address], 
-                        stderr=subprocess.DEVNULL
-                    ).decode()
-                    
-                    # Look for battery percentage in the output
-                    battery_match = re.search(r'Battery Percentage: \(0x[0-9a-f]+\) (\d+)', battery_output)
-                    if battery_match:
-                        battery_percent = battery_match.group(1)
-                        device_info.append(f"{device_name} {battery_percent}%")
-                    else:
-                        # If no battery info available, just show device name
-                        device_info.append(device_name)
-                        
-                except subprocess.CalledProcessError:
-                    # If we can't get info for this device, just show the name
-                    device_info.append(device_name)
-        
-        return f" {', '.join(device_info)}" if device_info else ""
-        
-    except subprocess.CalledProcessError:
-        return ""
+    return bluetooth.get_status()
 
 mod = "mod1"
 terminal = guess_terminal()
 
+home = os.path.expanduser("~")
+runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+
+autostart_env = dict(
+    os.environ,
+    PATH=f"{home}/.local/bin:{home}/.cargo/bin:{os.environ.get('PATH', '')}",
+    PULSE_SERVER=f"unix:{runtime_dir}/pulse/native",
+    PULSE_RUNTIME_PATH=f"{runtime_dir}/pulse",
+)
+
+# Services with no dependency between them start in parallel
+autostart_services = [
+    supervisor.Service("network", ready=supervisor.link_up("wlp192s0"), timeout=30),
+    supervisor.Service("picom", ["picom"]),
+    supervisor.Service("polkit", ["/usr/libexec/polkit-gnome-authentication-agent-1"]),
+    supervisor.Service("keyring", ["gnome-keyring-daemon", "--start", "--components=secrets,ssh,pkcs11"],
+                       ready=supervisor.dbus_name("org.freedesktop.secrets")),
+    supervisor.Service("power-manager", ["xfce4-power-manager"],
+                       ready=supervisor.dbus_name("org.xfce.PowerManager")),
+    supervisor.Service("nextcloud", ["nextcloud", "--background"], after=("keyring", "network")),
+    supervisor.Service("redshift", ["redshift"]),
+    supervisor.Service("greenclip", ["greenclip", "daemon"]),
+    supervisor.Service("xautolock", ["xautolock", "-time", "5", "-locker",
+                                     "/home/brandon/.local/bin/smart-lock.sh", "-detectsleep"]),
+    # Screen saver timeout: 10 minutes, DPMS standby: 15 minutes, off: 20 minutes
+    supervisor.Service("screensaver", ["xset", "s", "600", "600"], oneshot=True),
+    supervisor.Service("dpms", ["xset", "dpms", "900", "0", "1200"], oneshot=True),
+    supervisor.Service("pipewire", ["pipewire"],
+                       ready=supervisor.socket_exists(f"{runtime_dir}/pipewire-0")),
+    # Rerun until wireplumber reports device 119 as the default sink
+    supervisor.Service("default-sink", ["wpctl", "set-default", "119"], after=("pipewire",), oneshot=True,
+                       ready=supervisor.command_output(["wpctl", "inspect", "@DEFAULT_AUDIO_SINK@"], r"^id 119,")),
+]
+
+autostart_supervisor = supervisor.Supervisor(autostart_services, env=autostart_env)
+
 @hook.subscribe.startup_once
 def autostart():
-    subprocess.Popen(['/home/brandon/.config/qtile/autostart.sh'])
+    autostart_supervisor.start()
 
 @hook.subscribe.startup_complete
 def delayed_widget_start():
-    # Wait 10 seconds after startup completes for network to be ready
-    time.sleep(10)
-    # Force weather widget refresh
-    for screen in qtile.screens:
-        for widget in screen.top.widgets:
-            if hasattr(widget, 'update') and 'OpenWeather' in str(type(widget)):
-                widget.update()
-            elif hasattr(widget, 'force_update') and 'CheckUpdates' in str(type(widget)):
-                widget.force_update()
+    # Hold network widgets until the link is up, then refresh them in one staggered batch
+    poll_scheduler.refresh_network(supervisor.link_up("wlp192s0"))
+
+async def _restore_wallpaper():
+    try:
+        await wallpaper.restore(qtile.screens)
+    except Exception:
+        logger.exception("In-process wallpaper restore failed, falling back to nitrogen")
+        subprocess.Popen(['nitrogen', '--restore'])
+
+_wallpaper_task = None
 
 @hook.subscribe.startup
 def restore_wallpaper():
-    subprocess.Popen(['nitrogen', '--restore'])
+    # Paint from the pre-scaled cache; a cache miss is scaled in the executor
+    global _wallpaper_task
+    if _wallpaper_task is not None:
+        _wallpaper_task.cancel()
+    _wallpaper_task = asyncio.get_running_loop().create_task(_restore_wallpaper())
+
+@hook.subscribe.screens_reconfigured
+def repaint_wallpaper():
+    restore_wallpaper()
 
 decoration_group = {
     "decorations": [
@@ -191,7 +198,7 @@ keys = [
     Key([mod], "v", lazy.spawn("/home/brandon/.config/rofi/scripts/clipboard.sh"), desc="Launch Clipboard History"),
     Key([mod], "p", lazy.spawn("/home/brandon/.config/rofi/scripts/power-menu.sh"), desc="Launch Power Menu"),
     Key([mod, "shift"], "p", lazy.spawn("/home/brandon/.local/bin/package-manager.sh"), desc="Launch Package Manager"),
-    Key([mod, "control"], "l", lazy.spawn("betterlockscreen -l"), desc="Lock screen"),
+    Key([mod, "control"], "l", lazy.spawn("/home/brandon/.local/bin/lock.sh"), desc="Lock screen"),
     # Screenshots
     Key([mod], "Print", lazy.spawn("/home/brandon/.local/bin/rofi-screenshot"), desc="Screenshot menu"),
     Key([], "Print", lazy.spawn("scrot '%Y-%m-%d_%H-%M-%S_screenshot.png' -e 'mv $f ~/Nextcloud/Pictures/Screenshots/ && notify-send \"Screenshot saved\" \"$f\"'"), desc="Fullscreen screenshot"),
@@ -471,6 +478,50 @@ bottom_bar = bar.Bar(
     # border_color=["ff00ff", "000000", "ff00ff", "000000"]  # Borders are magenta
 )
 
+# Stretch polling on battery, pause it while locked or under a fullscreen window.
+# Wakeups per minute are sampled to /tmp/qtile_poll_stats.log (see scheduler.py)
+poll_scheduler = scheduler.PollScheduler(battery_factor=3.0)
+for bar_ in (top_bar, bottom_bar):
+    for bar_widget in bar_.widgets:
+        if 'Battery' in str(type(bar_widget)):
+            # The power state source keeps its own pace
+            poll_scheduler.attach_battery(bar_widget)
+            poll_scheduler.register(bar_widget, stretch=False)
+        else:
+            poll_scheduler.register(bar_widget, network=any(
+                name in str(type(bar_widget)) for name in ('OpenWeather', 'CheckUpdates', 'Wlan', 'GenPollText')))
+
+@hook.subscribe.float_change
+@hook.subscribe.focus_change
+@hook.subscribe.setgroup
+@hook.subscribe.client_managed
+@hook.subscribe.client_killed
+def bar_visibility_changed(*args):
+    poll_scheduler.update_visibility()
+
+# lock.sh (the lock key, smart-lock.sh and the power menu) fires these around betterlockscreen
+@hook.subscribe.user("screen_locked")
+def screen_locked():
+    poll_scheduler.set_locked(True)
+
+@hook.subscribe.user("screen_unlocked")
+def screen_unlocked():
+    poll_scheduler.set_locked(False)
+
+# Qtile's own logind hooks, which hold a sleep inhibitor while they run
+@hook.subscribe.suspend
+def system_suspend():
+    poll_scheduler.suspend()
+
+@hook.subscribe.resume
+def system_resume():
+    poll_scheduler.wake(supervisor.link_up("wlp192s0"))
+
+# Backstop from safe-suspend.sh in case the resume signal was missed
+@hook.subscribe.user("system_wake")
+def system_wake():
+    poll_scheduler.wake(supervisor.link_up("wlp192s0"))
+
 logo = os.path.join(os.path.dirname(libqtile.resources.__file__), "logo.png")
 
 
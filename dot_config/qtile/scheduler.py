@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Adaptive polling scheduler for Qtile bar widgets
+Stretches widget update intervals on battery and pauses polling while the
+screen is locked, the system is asleep or a bar is covered by a fullscreen window
+
+A stats() sample is appended to STATS_FILE once a minute. The live values can
+also be read from a running Qtile:
+
+    qtile cmd-obj -o cmd -f eval -a "__import__('sys').modules['config'].poll_scheduler.stats()"
+"""
+
+import asyncio
+import collections
+import os
+import time
+
+from libqtile import qtile
+from libqtile.log_utils import logger
+from libqtile.widget import base
+from libqtile.widget.battery import BatteryState
+
+from supervisor import wait_until
+
+STATS_FILE = "/tmp/qtile_poll_stats.log"
+STATS_MAX_BYTES = 1024 * 1024
+
+
+class _Entry:
+    """Scheduler state for one registered widget"""
+
+    def __init__(self, widget, stretch, network):
+        self.widget = widget
+        self.base_interval = widget.update_interval
+        self.stretch = stretch
+        self.network = network
+        self.pending = False
+        self.timer_setup = widget.timer_setup
+
+
+class PollScheduler:
+    """
+    Central control over when bar widgets poll
+
+    Registered widgets keep their own timers; the scheduler wraps each
+    widget's ``timer_setup`` so that a tick which lands while the widget is
+    paused is dropped and remembered. When the pause ends, every dropped tick
+    is replayed in a single coalesced refresh.
+
+    Args:
+        battery_factor (float): Interval multiplier while discharging
+    """
+
+    def __init__(self, battery_factor=3.0):
+        self.battery_factor = battery_factor
+        self.entries = []
+        self.on_battery = False
+        self.locked = False
+        self.covered = set()
+        self.asleep = False
+        self.offline = False
+        self._wake_task = None
+        self._wakeups = collections.deque()
+        self._visibility_queued = False
+        self._sampler = None
+
+    def register(self, widget, stretch=True, network=False):
+        """
+        Put a widget under the scheduler
+
+        Args:
+            widget: A polling widget with ``update_interval`` and ``timer_setup``
+            stretch (bool): Whether its interval grows on battery
+            network (bool): Whether it needs the network, so waits for link-up on wake
+        """
+        if not getattr(widget, "update_interval", None) or not hasattr(widget, "timer_setup"):
+            return
+        entry = _Entry(widget, stretch, network)
+
+        def timer_setup():
+            if self._paused(entry):
+                entry.pending = True
+                return
+            self._count_wakeup()
+            entry.timer_setup()
+
+        widget.timer_setup = timer_setup
+        self.entries.append(entry)
+
+    def attach_battery(self, battery_widget):
+        """Follow AC/battery state through the Battery widget's own status reads"""
+        source = battery_widget._battery
+        update_status = source.update_status
+
+        def snoop():
+            # Runs on the widget's poll thread; apply the change on the event loop
+            status = update_status()
+            qtile.call_soon_threadsafe(self.set_on_battery, status.state == BatteryState.DISCHARGING)
+            return status
+
+        source.update_status = snoop
+
+    def _paused(self, entry):
+        if self.locked or self.asleep:
+            return True
+        if entry.network and self.offline:
+            return True
+        bar = getattr(entry.widget, "bar", None)
+        return getattr(bar, "screen", None) in self.covered
+
+    def _count_wakeup(self):
+        now = time.monotonic()
+        self._wakeups.append(now)
+        while self._wakeups and now - self._wakeups[0] > 60:
+            self._wakeups.popleft()
+        if self._sampler is None:
+            self._sampler = qtile.call_later(60, self._sample)
+
+    def wakeups_per_minute(self):
+        """Widget ticks over the last 60 seconds"""
+        now = time.monotonic()
+        return sum(1 for stamp in self._wakeups if now - stamp <= 60)
+
+    def stats(self):
+        return {
+            "on_battery": self.on_battery,
+            "locked": self.locked,
+            "asleep": self.asleep,
+            "covered_screens": len(self.covered),
+            "wakeups_per_minute": self.wakeups_per_minute(),
+        }
+
+    def _alive(self):
+        """Whether any registered widget is still on a current bar (false after a reload)"""
+        bars = {id(bar) for screen in qtile.screens for bar in (screen.top, screen.bottom) if bar}
+        return any(id(getattr(entry.widget, "bar", None)) in bars for entry in self.entries)
+
+    def _sample(self):
+        """Append a stats() line to STATS_FILE, once a minute even while paused"""
+        if not self._alive():
+            self._sampler = None
+            return
+        try:
+            if os.path.exists(STATS_FILE) and os.path.getsize(STATS_FILE) > STATS_MAX_BYTES:
+                os.remove(STATS_FILE)
+            with open(STATS_FILE, "a") as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {self.stats()}\n")
+        except OSError:
+            logger.exception("poll scheduler: could not write %s", STATS_FILE)
+        self._sampler = qtile.call_later(60, self._sample)
+
+    def _log_state(self, reason):
+        logger.info("poll scheduler: %s %s", reason, self.stats())
+
+    def set_on_battery(self, on_battery):
+        if on_battery == self.on_battery:
+            return
+        self.on_battery = on_battery
+        factor = self.battery_factor if on_battery else 1
+        for entry in self.entries:
+            if entry.stretch:
+                # Picked up by the widget when it next re-arms its timer
+                entry.widget.update_interval = entry.base_interval * factor
+        self._log_state("power changed")
+
+    def set_locked(self, locked):
+        if locked == self.locked:
+            return
+        self.locked = locked
+        self._log_state("lock changed")
+        if not locked:
+            self._resume()
+
+    def suspend(self):
+        """Freeze all polling ahead of system sleep"""
+        if self._wake_task is not None:
+            self._wake_task.cancel()
+            self._wake_task = None
+        if self.asleep:
+            return
+        self.asleep = True
+        self.offline = True
+        self._log_state("suspending")
+
+    def wake(self, link_probe, timeout=30, stagger=0.5):
+        """
+        Resume polling after system sleep
+
+        Local widgets resume at once; network widgets wait for ``link_probe``
+        to pass (or ``timeout`` seconds) and are then refreshed in one batch,
+        ``stagger`` seconds apart.
+        """
+        if not self.asleep:
+            return
+        self.asleep = False
+        self._log_state("resumed")
+        self._resume()
+        self.refresh_network(link_probe, timeout, stagger)
+
+    def refresh_network(self, link_probe, timeout=30, stagger=0.5):
+        """
+        Hold network widgets until ``link_probe`` passes (or ``timeout``
+        seconds), then refresh them as one batch ``stagger`` seconds apart
+        """
+        if self._wake_task is not None:
+            self._wake_task.cancel()
+        self.offline = True
+        self._wake_task = asyncio.get_running_loop().create_task(
+            self._wait_for_network(link_probe, timeout, stagger)
+        )
+
+    async def _wait_for_network(self, link_probe, timeout, stagger):
+        online = await wait_until(link_probe, timeout)
+        self._wake_task = None
+        self.offline = False
+        self._log_state("network up" if online else "network wait timed out")
+        # Timers that had not expired before sleep are still far out, so poke
+        # those widgets once as well rather than leaving them stale
+        due = [entry for entry in self.entries if entry.network and not self._paused(entry)]
+        for i, entry in enumerate(due):
+            if entry.pending:
+                entry.pending = False
+                qtile.call_later(i * stagger, self._refresh, [entry])
+            else:
+                qtile.call_later(i * stagger, self._poke, entry)
+
+    def update_visibility(self):
+        """Queue a recheck of which bars are covered by fullscreen windows"""
+        if not self._visibility_queued:
+            self._visibility_queued = True
+            qtile.call_soon(self._check_visibility)
+
+    def _check_visibility(self):
+        self._visibility_queued = False
+        covered = {
+            screen
+            for screen in qtile.screens
+            if screen.group and any(
+                window.fullscreen and not window.minimized for window in screen.group.windows
+            )
+        }
+        if covered == self.covered:
+            return
+        self.covered = covered
+        self._log_state("visibility changed")
+        self._resume()
+
+    def _resume(self):
+        """Replay ticks dropped while paused, all in one loop iteration"""
+        due = [entry for entry in self.entries if entry.pending and not self._paused(entry)]
+        if not due:
+            return
+        for entry in due:
+            entry.pending = False
+        qtile.call_soon(self._refresh, due)
+
+    def _refresh(self, entries):
+        for entry in entries:
+            entry.widget.timer_setup()
+
+    def _poke(self, entry):
+        """Poll a widget once without touching its own timer"""
+        widget = entry.widget
+        if self._paused(entry):
+            return
+        self._count_wakeup()
+        if isinstance(widget, base.ThreadPoolText):
+            def on_done(future):
+                if future.exception() is None and future.result() is not None:
+                    widget.update(future.result())
+
+            qtile.run_in_executor(widget.poll).add_done_callback(on_done)
+        elif isinstance(widget, base.InLoopPollText):
+            widget.tick()
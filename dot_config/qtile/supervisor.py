@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Autostart supervisor for Qtile
+Starts a declarative list of services on Qtile's event loop, in parallel where
+dependencies allow, and waits on readiness probes instead of fixed sleeps
+"""
+
+import asyncio
+import os
+import re
+import stat
+import subprocess
+import time
+
+from dbus_fast import BusType, Message, MessageType
+from dbus_fast.aio import MessageBus
+
+LOG_FILE = "/tmp/qtile_autostart.log"
+PROBE_INTERVAL = 0.1
+
+# Shared D-Bus connections for name probes, keyed by bus type
+_buses = {}
+
+
+class Service:
+    """
+    A process to start at login
+
+    Args:
+        name (str): Name used in logs and by other services' ``after``
+        cmd (list): Command to run, or None for a probe-only target
+        after (tuple): Names of services that must be ready first
+        ready (callable): Async probe taking the service, see probes below
+        oneshot (bool): Run to completion, then check ``ready``; rerun until it passes
+        timeout (float): Seconds to wait for readiness before giving up
+
+    Exit statuses are never used: Qtile reaps every child itself, so Popen
+    only ever sees 0. Readiness comes from what a service leaves behind.
+    """
+
+    def __init__(self, name, cmd=None, after=(), ready=None, oneshot=False, timeout=15):
+        self.name = name
+        self.cmd = cmd
+        self.after = tuple(after)
+        self.ready = ready
+        self.oneshot = oneshot
+        self.timeout = timeout
+        self.proc = None
+        self.spawned = None
+        self.ok = False
+        self.event = asyncio.Event()
+
+
+# Readiness probes: each returns an async callable taking the service (or None)
+
+def process_alive(grace=0.5):
+    """Ready once the process has stayed up for ``grace`` seconds"""
+    async def probe(service):
+        if service.proc is None or service.proc.poll() is not None:
+            return False
+        return time.monotonic() - service.spawned >= grace
+    return probe
+
+
+def socket_exists(path):
+    """Ready once a unix socket exists at ``path``"""
+    path = os.path.expandvars(os.path.expanduser(path))
+
+    async def probe(service):
+        try:
+            return stat.S_ISSOCK(os.stat(path).st_mode)
+        except OSError:
+            return False
+    return probe
+
+
+def dbus_name(name, system=False):
+    """Ready once ``name`` has an owner on the session (or system) bus"""
+    bus_type = BusType.SYSTEM if system else BusType.SESSION
+
+    async def probe(service):
+        try:
+            bus = _buses.get(bus_type)
+            if bus is None or not bus.connected:
+                bus = _buses[bus_type] = await MessageBus(bus_type=bus_type).connect()
+            reply = await bus.call(
+                Message(
+                    destination="org.freedesktop.DBus",
+                    path="/org/freedesktop/DBus",
+                    interface="org.freedesktop.DBus",
+                    member="NameHasOwner",
+                    signature="s",
+                    body=[name],
+                )
+            )
+        except Exception:
+            return False
+        return reply.message_type == MessageType.METHOD_RETURN and reply.body[0]
+    return probe
+
+
+def command_output(cmd, pattern):
+    """Ready once ``cmd`` prints something matching the regex ``pattern``"""
+    regex = re.compile(pattern, re.MULTILINE)
+
+    def run():
+        try:
+            return subprocess.run(
+                cmd, stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=5
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    async def probe(service):
+        output = await asyncio.get_running_loop().run_in_executor(None, run)
+        return regex.search(output) is not None
+    # Each check forks a command, so check less often than the cheap probes
+    probe.interval = 0.5
+    return probe
+
+
+def link_up(interface):
+    """Ready once the network interface reports an operational link"""
+    path = f"/sys/class/net/{interface}/operstate"
+
+    async def probe(service):
+        try:
+            with open(path) as f:
+                return f.read().strip() == "up"
+        except OSError:
+            return False
+    return probe
+
+
+async def wait_until(probe, timeout, service=None):
+    """
+    Poll a probe until it passes
+
+    Returns:
+        bool: True if the probe passed before the timeout
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if await probe(service):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(getattr(probe, "interval", PROBE_INTERVAL))
+
+
+class Supervisor:
+    """Starts services in dependency order and records their start latency"""
+
+    def __init__(self, services, env=None, log_file=LOG_FILE):
+        self.services = {service.name: service for service in services}
+        self.env = env if env is not None else os.environ.copy()
+        self.log_file = log_file
+        self.latencies = {}
+        self.started = None
+        self._log = None
+        self._task = None
+
+        for service in services:
+            for dep in service.after:
+                if dep not in self.services:
+                    raise ValueError(f"{service.name}: unknown dependency {dep}")
+
+    def log(self, message):
+        self._log.write(f"{time.strftime('%a %b %d %H:%M:%S %Y')}: {message}\n")
+        self._log.flush()
+
+    def start(self):
+        """Schedule the supervisor on the running event loop"""
+        self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def run(self):
+        self.started = time.monotonic()
+        self._log = open(self.log_file, "w")
+        self.log("Starting Qtile autostart supervisor...")
+        try:
+            await asyncio.gather(*(self._start(service) for service in self.services.values()))
+            failed = [service.name for service in self.services.values() if not service.ok]
+            self.log(
+                f"All services settled in {time.monotonic() - self.started:.2f}s"
+                + (f", not ready: {', '.join(failed)}" if failed else "")
+            )
+        finally:
+            self._log.close()
+
+    def _spawn(self, service):
+        service.spawned = time.monotonic()
+        try:
+            service.proc = subprocess.Popen(
+                service.cmd,
+                env=self.env,
+                stdin=subprocess.DEVNULL,
+                stdout=self._log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except OSError as e:
+            self.log(f"{service.name}: failed to start - {e}")
+            return False
+        return True
+
+    async def _run_oneshot(self, service):
+        """Run a oneshot command until its ``ready`` probe passes or the timeout does"""
+        deadline = time.monotonic() + service.timeout
+        while time.monotonic() < deadline:
+            if not self._spawn(service):
+                return False
+            while service.proc.poll() is None:
+                await asyncio.sleep(PROBE_INTERVAL)
+            if service.ready is None or await service.ready(service):
+                return True
+            await asyncio.sleep(0.5)
+        return False
+
+    async def _wait_ready(self, service, probe):
+        """Poll the probe, giving up early if a plain daemon exits"""
+        deadline = time.monotonic() + service.timeout
+        while True:
+            if await probe(service):
+                return True
+            # Only for the default probe: services with their own probe
+            # (gnome-keyring --start) may exit and leave a daemon behind
+            if service.ready is None and service.proc is not None and service.proc.poll() is not None:
+                self.log(f"{service.name}: exited before it was ready")
+                return False
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(getattr(probe, "interval", PROBE_INTERVAL))
+
+    async def _start(self, service):
+        for dep in service.after:
+            await self.services[dep].event.wait()
+            if not self.services[dep].ok:
+                self.log(f"{service.name}: {dep} not ready, starting anyway")
+
+        begin = time.monotonic()
+        try:
+            if service.oneshot:
+                service.ok = await self._run_oneshot(service)
+            else:
+                if service.cmd is not None and not self._spawn(service):
+                    return
+                probe = service.ready or process_alive()
+                service.ok = await self._wait_ready(service, probe)
+        finally:
+            service.event.set()
+
+        now = time.monotonic()
+        self.latencies[service.name] = now - begin
+        if service.ok:
+            self.log(
+                f"{service.name}: ready in {now - begin:.2f}s "
+                f"({now - self.started:.2f}s since login)"
+            )
+        else:
+            self.log(f"{service.name}: not ready after {now - begin:.2f}s")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+In-process wallpaper restore for Qtile
+Reads nitrogen's saved config and paints the root window directly, keeping
+pre-scaled images in an on-disk cache so repaints never re-decode
+"""
+
+import configparser
+import hashlib
+import mmap
+import os
+
+import cairocffi
+import cairocffi.pixbuf
+import xcffib
+import xcffib.xproto as xproto
+from libqtile import qtile
+
+NITROGEN_CONFIG = os.path.expanduser("~/.config/nitrogen/bg-saved.cfg")
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "qtile", "wallpaper"
+)
+CACHE_KEEP = 8
+
+# nitrogen's SetBG modes as stored in bg-saved.cfg
+MODE_SCALE = 0
+MODE_TILE = 1
+MODE_CENTER = 2
+MODE_ZOOM = 3
+MODE_AUTO = 4
+MODE_ZOOM_FILL = 5
+
+# Surfaces already mapped in this process, keyed by cache key, and the one
+# root painter. Qtile reloads config-dir modules with importlib.reload on every
+# config reload, so keep both instead of leaking a connection and pixmap each time
+try:
+    _surfaces
+except NameError:
+    _surfaces = {}
+try:
+    _painter
+except NameError:
+    _painter = None
+
+
+def read_nitrogen_config(path=NITROGEN_CONFIG):
+    """
+    Read wallpaper entries from nitrogen's bg-saved.cfg
+
+    Args:
+        path (str): Path to bg-saved.cfg
+
+    Returns:
+        list: (head, file, mode, bgcolor) tuples, head is -1 for the full root
+    """
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(path)
+
+    entries = []
+    for section in parser.sections():
+        head = -1
+        if section.startswith("xin_"):
+            try:
+                head = int(section[4:])
+            except ValueError:
+                continue
+        file = parser.get(section, "file", fallback=None)
+        if not file:
+            continue
+        mode = parser.getint(section, "mode", fallback=MODE_AUTO)
+        bgcolor = parser.get(section, "bgcolor", fallback="#000000")
+        entries.append((head, file, mode, bgcolor))
+    return entries
+
+
+def _parse_colour(colour):
+    """Convert #rrggbb into a cairo rgb tuple"""
+    colour = colour.lstrip("#")
+    try:
+        return tuple(int(colour[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    except ValueError:
+        return (0, 0, 0)
+
+
+def _cache_key(file, mode, bgcolor, width, height):
+    st = os.stat(file)
+    raw = f"{os.path.abspath(file)}\0{st.st_mtime_ns}\0{st.st_size}\0{mode}\0{bgcolor}\0{width}x{height}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+def _render(file, mode, bgcolor, width, height):
+    """Decode and scale an image once into an ARGB32 surface of the output size"""
+    with open(file, "rb") as f:
+        image, _ = cairocffi.pixbuf.decode_to_image_surface(f.read())
+
+    surface = cairocffi.ImageSurface(cairocffi.FORMAT_ARGB32, width, height)
+    context = cairocffi.Context(surface)
+    context.set_source_rgb(*_parse_colour(bgcolor))
+    context.paint()
+
+    image_width = image.get_width()
+    image_height = image.get_height()
+
+    if mode == MODE_TILE:
+        pattern = cairocffi.SurfacePattern(image)
+        pattern.set_extend(cairocffi.EXTEND_REPEAT)
+        context.set_source(pattern)
+    else:
+        if mode == MODE_SCALE:
+            scale_x = width / image_width
+            scale_y = height / image_height
+        elif mode == MODE_CENTER:
+            scale_x = scale_y = 1
+        elif mode == MODE_ZOOM_FILL:
+            scale_x = scale_y = max(width / image_width, height / image_height)
+        else:
+            # Zoom and auto both fit the whole image inside the output
+            scale_x = scale_y = min(width / image_width, height / image_height)
+
+        context.translate(
+            (width - image_width * scale_x) / 2, (height - image_height * scale_y) / 2
+        )
+        context.scale(scale_x, scale_y)
+        context.set_source_surface(image)
+        context.get_source().set_filter(cairocffi.FILTER_BEST)
+    context.paint()
+    surface.flush()
+    return surface
+
+
+def _prune_cache():
+    """Keep only the most recently used cache files"""
+    try:
+        files = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".argb")]
+    except OSError:
+        return
+    files.sort(key=lambda name: os.stat(name).st_mtime, reverse=True)
+    for stale in files[CACHE_KEEP:]:
+        try:
+            os.remove(stale)
+        except OSError:
+            pass
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.argb")
+
+
+def _stride(width):
+    return cairocffi.ImageSurface.format_stride_for_width(cairocffi.FORMAT_ARGB32, width)
+
+
+def cached_surface(file, mode, bgcolor, width, height):
+    """
+    Get a pre-scaled surface from memory or the on-disk cache
+
+    Never decodes or scales, so it is cheap enough for the event loop.
+
+    Returns:
+        cairocffi.ImageSurface: ARGB32 surface of width x height, or None on a miss
+    """
+    key = _cache_key(file, mode, bgcolor, width, height)
+    if key in _surfaces:
+        return _surfaces[key][0]
+
+    stride = _stride(width)
+    path = _cache_path(key)
+    if not os.path.exists(path) or os.path.getsize(path) != stride * height:
+        return None
+    os.utime(path)
+
+    with open(path, "rb") as f:
+        # Copy-on-write mapping: cairo wants a writable buffer but we never write
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    surface = cairocffi.ImageSurface.create_for_data(
+        data, cairocffi.FORMAT_ARGB32, width, height, stride
+    )
+    _surfaces[key] = (surface, data)
+    return surface
+
+
+def render_to_cache(file, mode, bgcolor, width, height):
+    """Decode and scale an image into the on-disk cache (slow, run off the event loop)"""
+    path = _cache_path(_cache_key(file, mode, bgcolor, width, height))
+    surface = _render(file, mode, bgcolor, width, height)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(bytes(surface.get_data()))
+    os.replace(tmp, path)
+    _prune_cache()
+
+
+class RootPainter:
+    """Paints surfaces onto a root window pixmap and publishes it for compositors"""
+
+    def __init__(self, display=None):
+        self.conn = xcffib.connect(display=display)
+        self.screen = self.conn.get_setup().roots[self.conn.pref_screen]
+        self.root = self.screen.root
+        self.visual = self._root_visual()
+        self.pixmap = None
+        self.size = (0, 0)
+        self.atoms = {
+            name: self.conn.core.InternAtom(False, len(name), name).reply().atom
+            for name in ("_XROOTPMAP_ID", "ESETROOT_PMAP_ID")
+        }
+        # Like xcbq.Painter: keep the pixmap valid for compositors even if this
+        # connection closes, and free whatever an earlier setter left behind
+        self.conn.core.SetCloseDownMode(xproto.CloseDown.RetainPermanent)
+        self._kill_previous_pixmap()
+
+    def _kill_previous_pixmap(self):
+        """Release the retained resources of the last esetroot-style setter (e.g. nitrogen)"""
+        reply = self.conn.core.GetProperty(
+            False, self.root, self.atoms["ESETROOT_PMAP_ID"], xproto.Atom.PIXMAP, 0, 1
+        ).reply()
+        if reply.format == 32 and reply.value_len:
+            self.conn.core.KillClient(reply.value.to_atoms()[0])
+
+    def _root_visual(self):
+        for depth in self.screen.allowed_depths:
+            for visual in depth.visuals:
+                if visual.visual_id == self.screen.root_visual:
+                    return visual
+        raise RuntimeError("Root visual not found")
+
+    def root_size(self):
+        """Current root window size, which changes on monitor hotplug"""
+        geometry = self.conn.core.GetGeometry(self.root).reply()
+        return geometry.width, geometry.height
+
+    def _ensure_pixmap(self):
+        size = self.root_size()
+        if self.pixmap is not None and size == self.size:
+            return
+        if self.pixmap is not None:
+            self.conn.core.FreePixmap(self.pixmap)
+        self.pixmap = self.conn.generate_id()
+        self.conn.core.CreatePixmap(self.screen.root_depth, self.pixmap, self.root, *size)
+        self.size = size
+        # New pixmaps hold garbage; clear anything the entries do not cover
+        with cairocffi.XCBSurface(self.conn, self.pixmap, self.visual, *self.size) as target:
+            context = cairocffi.Context(target)
+            context.set_source_rgb(0, 0, 0)
+            context.paint()
+
+    def paint(self, surface, x, y):
+        """Copy a surface onto the root pixmap at the given offset"""
+        self._ensure_pixmap()
+        with cairocffi.XCBSurface(self.conn, self.pixmap, self.visual, *self.size) as target:
+            context = cairocffi.Context(target)
+            context.set_source_surface(surface, x, y)
+            context.paint()
+
+    def commit(self):
+        """Set the painted pixmap as the root background"""
+        for atom in self.atoms.values():
+            self.conn.core.ChangeProperty(
+                xproto.PropMode.Replace, self.root, atom, xproto.Atom.PIXMAP, 32, 1, [self.pixmap]
+            )
+        self.conn.core.ChangeWindowAttributes(self.root, xproto.CW.BackPixmap, [self.pixmap])
+        self.conn.core.ClearArea(0, self.root, 0, 0, *self.size)
+        self.conn.flush()
+
+
+async def restore(screens, config=NITROGEN_CONFIG):
+    """
+    Paint the wallpapers saved by nitrogen without spawning it
+
+    Images missing from the cache are decoded and scaled in Qtile's executor;
+    painting happens once they are all ready.
+
+    Args:
+        screens (list): Qtile screens, used for per-head (xin_N) entries
+        config (str): Path to nitrogen's bg-saved.cfg
+    """
+    global _painter
+
+    entries = read_nitrogen_config(config)
+    if not entries:
+        return
+
+    if _painter is None:
+        _painter = RootPainter()
+
+    root_width, root_height = _painter.root_size()
+    targets = []
+    for head, file, mode, bgcolor in entries:
+        if head < 0:
+            rect = (0, 0, root_width, root_height)
+        elif head < len(screens):
+            screen = screens[head]
+            rect = (screen.x, screen.y, screen.width, screen.height)
+        else:
+            continue
+        x, y, width, height = rect
+        surface = cached_surface(file, mode, bgcolor, width, height)
+        if surface is None:
+            await qtile.run_in_executor(render_to_cache, file, mode, bgcolor, width, height)
+            surface = cached_surface(file, mode, bgcolor, width, height)
+        targets.append((surface, x, y))
+
+    for surface, x, y in targets:
+        _painter.paint(surface, x, y)
+    _painter.commit()
+
+
+if __name__ == "__main__":
+    # Print what would be painted
+    for entry in read_nitrogen_config():
+        print(entry)
@@ -13,7 +13,7 @@ chosen=$(echo -e "$options" | rofi -theme /home/brandon/.config/rofi/themes/nord
 case "$chosen" in
     "  Lock")
         # Use betterlockscreen to lock the session
-        betterlockscreen -l
+        /home/brandon/.local/bin/lock.sh
         ;;
     "  Logout")
         # Logout from Qtile
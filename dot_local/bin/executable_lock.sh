@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# Lock the screen with betterlockscreen
+# Tells qtile around the lock so it can pause bar polling meanwhile
+
+qtile cmd-obj -o cmd -f fire_user_hook -a screen_locked 2>/dev/null
+betterlockscreen -l "$@"
+qtile cmd-obj -o cmd -f fire_user_hook -a screen_unlocked 2>/dev/null
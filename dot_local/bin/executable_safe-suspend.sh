@@ -11,6 +11,12 @@ log() {
     echo "$(date): $1" >> "$LOG_FILE"
 }
 
+# Tell qtile the system is awake in case it missed logind's resume. Qtile's
+# suspend hook drives the freeze, so only wake is sent from here
+qtile_hook() {
+    qtile cmd-obj -o cmd -f fire_user_hook -a "$1" >/dev/null 2>&1
+}
+
 # Function to remove mt7925e WiFi driver
 remove_wifi_driver() {
     log "Checking for mt7925e driver..."
@@ -124,8 +130,10 @@ do_hibernate() {
 do_resume() {
     log "Starting resume process..."
     reload_wifi_driver
+    local reload_status=$?
+    qtile_hook system_wake
     
-    if [ $? -eq 0 ]; then
+    if [ $reload_status -eq 0 ]; then
         log "Resume completed successfully"
         return 0
     else
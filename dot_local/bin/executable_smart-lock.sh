@@ -112,5 +112,5 @@ if [ -n "$fullscreen_result" ] || [ -n "$audio_result" ] || [ -n "$media_result"
     exit 0  # Don't lock, exit silently
 else
     echo "$(date): No media detected, proceeding with lock" >> /tmp/smart-lock.log
-    betterlockscreen -l
+    /home/brandon/.local/bin/lock.sh
 fi
\ No newline at end of file